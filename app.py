@@ -1,35 +1,155 @@
 from __future__ import annotations
 
+import csv
+import hashlib
+import hmac
+import io
 import os
-from datetime import date, timedelta
+from collections import OrderedDict
+from datetime import date
+from pathlib import Path
 from typing import Optional
 
+import aiofiles
+import anyio
+import orjson
+from cachetools import TTLCache
 from fastapi import FastAPI, Request, Form, Depends, UploadFile, File
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
 from passlib.context import CryptContext
+from sqlalchemy import Column, Computed, Date, Index, event, func, inspect, or_, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.schema import CreateColumn
 from sqlmodel import SQLModel, Field, Session, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from starlette.middleware.sessions import SessionMiddleware
 import secrets
+import tempfile
+import threading
 
 APP_NAME = "RaiDaeng FarmOS"
+# signs the auth cookie and the session; without a fixed SECRET_KEY every restart
+# logs everyone out and workers reject each other's cookies (render.yaml sets one)
+SECRET_KEY = os.getenv("SECRET_KEY") or secrets.token_hex(32)
 
 # -----------------------------
 # DATABASE
 # -----------------------------
 DB_URL = os.getenv("DATABASE_URL") or os.getenv("FARMOS_DB", "sqlite:///farm.db")
 connect_args = {"check_same_thread": False} if DB_URL.startswith("sqlite") else {}
+
+def async_db_url(url: str) -> str:
+    for prefix, driver in (
+        ("sqlite:", "sqlite+aiosqlite:"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+    ):
+        if url.startswith(prefix):
+            return driver + url[len(prefix):]
+    return url
+
+# the sync engine only bootstraps the schema at startup; requests go through the
+# async one so database waits don't tie up a threadpool worker
+# connections stay open across requests (WAL lets the extra readers proceed while
+# one writes); a server database also gets a liveness check on checkout
+pool_args = {"pool_size": 10, "max_overflow": 20}
+if not DB_URL.startswith("sqlite"):
+    pool_args["pool_pre_ping"] = True
 engine = create_engine(DB_URL, connect_args=connect_args)
+async_engine = create_async_engine(async_db_url(DB_URL), connect_args=connect_args, **pool_args)
+
+def _sqlite_pragmas(dbapi_conn, _record):
+    # WAL lets readers run alongside a writer; NORMAL drops the per-commit fsync
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA mmap_size=268435456")
+    cur.execute("PRAGMA cache_size=-65536")
+    cur.close()
+
+if DB_URL.startswith("sqlite"):
+    event.listen(engine, "connect", _sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _sqlite_pragmas)
+
+# pin the work factor so it can be tuned per deploy box (passlib default: 29000);
+# min/max make needs_update() flag hashes made with any other rounds, so they
+# are re-hashed on the next successful login
+HASH_ROUNDS = int(os.getenv("FARMOS_HASH_ROUNDS", "29000"))
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    pbkdf2_sha256__default_rounds=HASH_ROUNDS,
+    pbkdf2_sha256__min_rounds=HASH_ROUNDS,
+    pbkdf2_sha256__max_rounds=HASH_ROUNDS,
+    deprecated="auto",
+)
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# successful verifies keyed by (hash, HMAC(pepper, password)); no plaintext is kept
+# and a password change produces a new hash, so stale entries simply stop matching
+VERIFY_CACHE_SIZE = 4096
+_verify_pepper = secrets.token_bytes(32)
+_verified: OrderedDict[tuple[str, bytes], bool] = OrderedDict()
+# verify_password runs on several hashing threads at once; the KDF itself stays
+# outside the lock
+_verified_lock = threading.Lock()
+
+def verify_password(password: str, password_hash: str) -> bool:
+    key = (password_hash, hmac.new(_verify_pepper, password.encode(), "sha256").digest())
+    with _verified_lock:
+        if key in _verified:
+            _verified.move_to_end(key)
+            return True
+    if not pwd_context.verify(password, password_hash):
+        return False
+    with _verified_lock:
+        _verified[key] = True
+        if len(_verified) > VERIFY_CACHE_SIZE:
+            _verified.popitem(last=False)
+    return True
+
+# hashing gets its own worker threads, one per CPU, so slow KDF calls from the
+# async auth routes neither block the event loop nor use up the shared threadpool
+_hash_limiter = anyio.CapacityLimiter(os.cpu_count() or 1)
+
+async def run_hashing(func, *args):
+    return await anyio.to_thread.run_sync(func, *args, limiter=_hash_limiter)
+
+# both login caches are per process and only see this worker's writes; anything
+# changed elsewhere (another worker, or directly in the database) shows up once
+# the entry expires, so keep their TTLs short
+LOGIN_CACHE_TTL = 30
+
+# usernames that recently matched no account; repeated guesses against them are
+# rejected without a query. register drops the name so a new account works at once
+# on this worker, but another worker may still reject it until the entry expires
+_unknown_usernames: TTLCache = TTLCache(maxsize=4096, ttl=LOGIN_CACHE_TTL)
+
+# (id, password_hash, role) of recently seen accounts, so repeat logins skip the
+# SELECT; a failed verify re-reads the row in case the hash changed since caching,
+# and login rewrites the entry whenever it re-hashes a password
+_login_accounts: TTLCache = TTLCache(maxsize=256, ttl=LOGIN_CACHE_TTL)
+
+# failed logins for unknown usernames still pay for one verify against this, so
+# response time doesn't reveal whether an account exists
+DUMMY_HASH = pwd_context.hash(secrets.token_hex(16))
 
 # -----------------------------
 # UPLOAD FOLDER
 # -----------------------------
 UPLOAD_DIR = "static/uploads"
+UPLOAD_CHUNK_SIZE = 1 << 20
+# uploads are served from our own origin, so only image types may keep their
+# extension; anything else (.html, .svg) is stored bare and served as nosniff text/plain
+UPLOAD_IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 # -----------------------------
@@ -60,69 +180,202 @@ class Plot(SQLModel, table=True):
     area_rai: float
 
 
+# harvest_date is generated by the database so month filters can use an index.
+# SQLite gets a VIRTUAL column (it can be added to an existing table with ALTER),
+# Postgres only supports STORED ones.
+if DB_URL.startswith("sqlite"):
+    HARVEST_DATE = Computed("date(plant_date, '+' || days_to_harvest || ' days')")
+else:
+    HARVEST_DATE = Computed("plant_date + days_to_harvest", persisted=True)
+
+
+# plantings still in the ground; harvested/cancelled rounds pile up over the
+# seasons but are left out of this much smaller index
+ACTIVE_PLANTING = text("status NOT IN ('ขุดแล้ว', 'ยกเลิก')")
+
+
 class Planting(SQLModel, table=True):
+    __table_args__ = (
+        Index(
+            "ix_planting_active",
+            "harvest_date",
+            sqlite_where=ACTIVE_PLANTING,
+            postgresql_where=ACTIVE_PLANTING,
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     plot_id: int = Field(foreign_key="plot.id", index=True)
     plant_date: date
     days_to_harvest: int = 120
     yield_ton_per_rai: float = 1.5
     status: str = "ปลูกแล้ว"
+    harvest_date: Optional[date] = Field(
+        default=None, sa_column=Column(Date, HARVEST_DATE, index=True)
+    )
+
 
-    @property
-    def harvest_date(self) -> date:
-        return self.plant_date + timedelta(days=self.days_to_harvest)
+# "YYYY-MM" of the harvest date, for grouping in SQL
+if DB_URL.startswith("sqlite"):
+    HARVEST_MONTH = func.strftime("%Y-%m", Planting.harvest_date)
+else:
+    HARVEST_MONTH = func.to_char(Planting.harvest_date, "YYYY-MM")
 
 
 # -----------------------------
 # APP
 # -----------------------------
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that lets browsers keep uploads, which never change once written."""
+
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code == 200 and path.replace(os.sep, "/").startswith("uploads/"):
+            response.headers["Cache-Control"] = "public, max-age=86400, immutable"
+            response.headers["X-Content-Type-Options"] = "nosniff"
+        return response
+
+
 app = FastAPI(title=APP_NAME)
-app.mount("/static", StaticFiles(directory="static"), name="static")
-templates = Jinja2Templates(directory="templates")
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
+
+# compiled templates are cached on disk across restarts; set FARMOS_TEMPLATE_RELOAD=1
+# while editing templates to re-check their mtimes on every render. With no
+# directory Jinja uses a private per-user (0700, owner-checked) temp directory,
+# so other local users can't plant bytecode for it to load
+templates = Jinja2Templates(env=Environment(
+    loader=FileSystemLoader("templates"),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=os.getenv("FARMOS_TEMPLATE_RELOAD") == "1",
+    bytecode_cache=FileSystemBytecodeCache(),
+))
+# |tojson (the dashboard's embedded chart series) encodes with orjson
+templates.env.policies["json.dumps_function"] = lambda obj: orjson.dumps(obj).decode()
+templates.env.policies["json.dumps_kwargs"] = {}
+# shared by every page title, so handlers don't pass it in each context
+templates.env.globals["app"] = APP_NAME
 
 # ✅ ใช้ secret key เดียวแน่นอน
 app.add_middleware(
     SessionMiddleware,
-    secret_key=os.getenv("SECRET_KEY") or secrets.token_hex(32)
+    secret_key=SECRET_KEY
 )
 
 @app.get("/")
 def root():
     return RedirectResponse("/login", status_code=303)
 
+def add_harvest_date_column():
+    # create_all() never alters tables that already exist
+    columns = {c["name"] for c in inspect(engine).get_columns("planting")}
+    if "harvest_date" in columns:
+        return
+    column = Planting.__table__.c.harvest_date
+    ddl = CreateColumn(column).compile(dialect=engine.dialect)
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE planting ADD COLUMN {ddl}"))
+
+# written after a successful bootstrap so later starts (reloads, extra workers)
+# skip the schema check and admin seed; it records which database and schema
+# version it was for, so bump SCHEMA_VERSION when create_db() learns something new
+BOOTSTRAP_SENTINEL = Path(".farm.bootstrapped")
+SCHEMA_VERSION = 2
+
+def bootstrap_marker() -> str:
+    return hashlib.sha256(f"{SCHEMA_VERSION}:{DB_URL}".encode()).hexdigest()
+
+def is_bootstrapped() -> bool:
+    if not BOOTSTRAP_SENTINEL.exists():
+        return False
+    if BOOTSTRAP_SENTINEL.read_text() != bootstrap_marker():
+        return False
+    # a deleted SQLite file must be recreated even if the sentinel survived
+    if DB_URL.startswith("sqlite"):
+        return os.path.exists(engine.url.database or "")
+    # a server database can be dropped or reset behind a surviving sentinel;
+    # one catalogue lookup is still far cheaper than a full bootstrap
+    return inspect(engine).has_table(User.__tablename__)
+
 def create_db():
+    if is_bootstrapped():
+        return
     SQLModel.metadata.create_all(engine)
+    add_harvest_date_column()
+    # indexes added after a table was first created
+    for index in Planting.__table__.indexes:
+        index.create(engine, checkfirst=True)
     with Session(engine) as session:
-        admin = session.exec(select(User).where(User.username == "admin")).first()
-        if not admin:
-            session.add(
-                User(
+        # the cheap probe avoids hashing on every bootstrap; the conflict-ignoring
+        # insert keeps workers that start together from tripping the unique index
+        admin_id = session.scalar(select(User.id).where(User.username == "admin"))
+        if admin_id is None:
+            insert = sqlite_insert if DB_URL.startswith("sqlite") else pg_insert
+            session.exec(
+                insert(User)
+                .values(
                     username="admin",
                     password_hash=pwd_context.hash("admin1234"),
                     role="owner",
                     full_name="Owner",
                     phone="0000000000",
                 )
+                .on_conflict_do_nothing(index_elements=["username"])
             )
             session.commit()
+    BOOTSTRAP_SENTINEL.write_text(bootstrap_marker())
 
 create_db()
 
-def get_session():
-    with Session(engine) as session:
+async def get_session():
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
         yield session
 
+# read-heavy aggregates are cached per process for a short TTL and keyed by a
+# version number that every write handler bumps, so this worker never serves
+# stale data for its own writes
+DATA_CACHE_TTL = 30
+_data_version = 0
+_dashboard_cache: TTLCache = TTLCache(maxsize=256, ttl=DATA_CACHE_TTL)
+
+def bump_data_version():
+    global _data_version
+    _data_version += 1
+
 # -----------------------------
 # AUTH
 # -----------------------------
-def require_user(request: Request, session: Session = Depends(get_session)) -> User:
-    user_id = request.cookies.get("farmos_user")
-    if not user_id:
+# the auth cookie carries a signed, timestamped {id, role, username} payload so
+# most pages can check access without loading the user row
+AUTH_COOKIE_MAX_AGE = 86400
+cookie_signer = URLSafeTimedSerializer(SECRET_KEY, salt="farmos-user")
+
+def require_user(request: Request) -> User:
+    cookie = request.cookies.get("farmos_user")
+    if not cookie:
+        raise PermissionError
+    try:
+        payload = cookie_signer.loads(cookie, max_age=AUTH_COOKIE_MAX_AGE)
+    except BadSignature:  # also raised (as SignatureExpired) once the cookie is too old
         raise PermissionError
-    user = session.get(User, int(user_id))
-    if not user:
+    return User(id=payload["id"], role=payload["role"], username=payload["un"])
+
+# profile rows change rarely; keep them briefly so page reloads skip the query
+_user_records: TTLCache = TTLCache(maxsize=256, ttl=60)
+
+async def require_user_record(user: User = Depends(require_user), session: AsyncSession = Depends(get_session)) -> User:
+    cached = _user_records.get(user.id)
+    if cached is not None:
+        return cached
+    # everything the pages show, but never the password hash
+    row = (await session.exec(
+        select(User.id, User.username, User.role, User.full_name, User.phone, User.image)
+        .where(User.id == user.id)
+        .limit(1)
+    )).first()
+    if not row:
         raise PermissionError
-    return user
+    record = _user_records[user.id] = User(**row._mapping)
+    return record
 
 @app.exception_handler(PermissionError)
 async def perm_handler(request: Request, exc: PermissionError):
@@ -131,41 +384,66 @@ async def perm_handler(request: Request, exc: PermissionError):
 # -----------------------------
 # REGISTER
 # -----------------------------
+async def save_upload(upload: UploadFile) -> str:
+    """Store ``upload`` under UPLOAD_DIR by content hash and return its relative path.
+
+    Identical files map to the same path, so a second copy is never written.
+    """
+    ext = os.path.splitext(upload.filename or "")[1].lower()
+    if ext not in UPLOAD_IMAGE_EXTS:
+        ext = ""
+    digest = hashlib.blake2b(digest_size=16)
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, suffix=".part")
+    os.close(fd)
+    try:
+        async with aiofiles.open(tmp_path, "wb") as buffer:
+            while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                await buffer.write(chunk)
+        name = digest.hexdigest()
+        relpath = f"{name[:2]}/{name}{ext}"
+        path = os.path.join(UPLOAD_DIR, relpath)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return relpath
+
 @app.get("/register", response_class=HTMLResponse)
 def register_page(request: Request):
     return templates.TemplateResponse("register.html", {"request": request})
 
 @app.post("/register")
-def register(
+async def register(
     username: str = Form(...),
     password: str = Form(...),
     full_name: str = Form(...),
     phone: str = Form(...),
     image: UploadFile = File(None),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
-    exists = session.exec(select(User).where(User.username == username)).first()
-    if exists:
-        return RedirectResponse("/register?err=1", status_code=303)
-
     filename = None
-    if image:
-        filename = image.filename
-        filepath = os.path.join(UPLOAD_DIR, filename)
-        with open(filepath, "wb") as buffer:
-            buffer.write(image.file.read())
+    if image and image.filename:
+        filename = await save_upload(image)
 
     user = User(
         username=username,
-        password_hash=pwd_context.hash(password),
+        password_hash=await run_hashing(pwd_context.hash, password),
         role="farmer",
         full_name=full_name,
         phone=phone,
         image=filename,
     )
+    # the unique index on username rejects duplicates, no need to SELECT first;
+    # flush assigns user.id so the user and farmer rows share one commit
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    try:
+        await session.flush()
+    except IntegrityError:
+        await session.rollback()
+        return RedirectResponse("/register?err=1", status_code=303)
 
     farmer = Farmer(
         user_id=user.id,
@@ -174,7 +452,9 @@ def register(
         phone=phone,
     )
     session.add(farmer)
-    session.commit()
+    await session.commit()
+    bump_data_version()
+    _unknown_usernames.pop(username, None)
 
     return RedirectResponse("/login", status_code=303)
 
@@ -185,20 +465,55 @@ def register(
 def login_page(request: Request):
     return templates.TemplateResponse("login.html", {"request": request})
 
+async def fetch_login_account(session: AsyncSession, username: str) -> Optional[tuple]:
+    row = (await session.exec(
+        select(User.id, User.password_hash, User.role).where(User.username == username).limit(1)
+    )).first()
+    if not row:
+        _login_accounts.pop(username, None)
+        _unknown_usernames[username] = True
+        return None
+    account = _login_accounts[username] = tuple(row)
+    return account
+
 @app.post("/login")
-def login(
+async def login(
     username: str = Form(...),
     password: str = Form(...),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
-    user = session.exec(select(User).where(User.username == username)).first()
-    if not user or not pwd_context.verify(password, user.password_hash):
+    account = _login_accounts.get(username)
+    from_cache = account is not None
+    if account is None and username not in _unknown_usernames:
+        account = await fetch_login_account(session, username)
+    if account is None:
+        await run_hashing(pwd_context.verify, password, DUMMY_HASH)
+        return RedirectResponse("/login?err=1", status_code=303)
+
+    ok = await run_hashing(verify_password, password, account[1])
+    if not ok and from_cache:
+        # only a password changed since caching deserves a second KDF; otherwise every
+        # failed login costs exactly one verify, same as an unknown username
+        cached_hash = account[1]
+        account = await fetch_login_account(session, username)
+        if account is not None and account[1] != cached_hash:
+            ok = await run_hashing(verify_password, password, account[1])
+    if not ok:
         return RedirectResponse("/login?err=1", status_code=303)
 
+    user_id, password_hash, role = account
+
+    if pwd_context.needs_update(password_hash):
+        new_hash = await run_hashing(pwd_context.hash, password)
+        await session.exec(update(User).where(User.id == user_id).values(password_hash=new_hash))
+        await session.commit()
+        _login_accounts[username] = (user_id, new_hash, role)
+
     resp = RedirectResponse("/profile", status_code=303)
     resp.set_cookie(
         key="farmos_user",
-        value=str(user.id),
+        value=cookie_signer.dumps({"id": user_id, "role": role, "un": username}),
+        max_age=AUTH_COOKIE_MAX_AGE,
         httponly=True,
         samesite="lax"
     )
@@ -214,39 +529,240 @@ def logout():
 # PROFILE PAGE
 # -----------------------------
 @app.get("/profile", response_class=HTMLResponse)
-def profile_page(request: Request, user: User = Depends(require_user)):
+async def profile_page(request: Request, user: User = Depends(require_user_record)):
     return templates.TemplateResponse(
         "profile.html",
         {"request": request, "user": user},
     )
 
+def month_key(d: date) -> str:
+    # isoformat() is already zero-padded YYYY-MM-DD
+    return d.isoformat()[:7]
+
+def month_range(month: str) -> tuple[date, date]:
+    """Return the [start, end) dates of a ``YYYY-MM`` month."""
+    start = date.fromisoformat(f"{month}-01")
+    if start.month == 12:
+        return start, date(start.year + 1, 1, 1)
+    return start, date(start.year, start.month + 1, 1)
+
+def plantings_query(*columns):
+    # one JOIN instead of loading planting/plot/farmer separately
+    return (
+        select(*columns)
+        .select_from(Planting)
+        .join(Plot, Plot.id == Planting.plot_id)
+        .join(Farmer, Farmer.id == Plot.farmer_id)
+    )
+
+async def dashboard_data(session: AsyncSession, user: User) -> tuple[dict, list]:
+    """Return the dashboard ``(kpi, series)`` for ``user``, cached up to DATA_CACHE_TTL."""
+    scope = None if user.role == "owner" else user.id
+    key = (_data_version, scope)
+    cached = _dashboard_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # farmers only see their own rows; the filter runs on the Farmer.user_id index
+    filters = [] if scope is None else [Farmer.user_id == user.id]
+
+    farmer_count = (await session.exec(select(func.count(Farmer.id)).where(*filters))).one()
+    plot_count = (await session.exec(
+        select(func.count(Plot.id)).join(Farmer, Farmer.id == Plot.farmer_id).where(*filters)
+    )).one()
+    # per-month totals are summed by the database; only one row per month comes back
+    monthly = (await session.exec(
+        plantings_query(
+            HARVEST_MONTH,
+            func.sum(Plot.area_rai * Planting.yield_ton_per_rai),
+            func.count(Planting.id),
+        )
+        .where(*filters)
+        .group_by(HARVEST_MONTH)
+        .order_by(HARVEST_MONTH)
+    )).all()
+    series = [{"month": m, "tons": round(tons, 3)} for m, tons, _ in monthly]
+
+    # the next harvest only counts rounds still in the ground; the ACTIVE_PLANTING
+    # predicate lets this range read come from the partial ix_planting_active
+    next_month = (await session.exec(
+        plantings_query(HARVEST_MONTH, func.sum(Plot.area_rai * Planting.yield_ton_per_rai))
+        .where(*filters, ACTIVE_PLANTING, Planting.harvest_date >= date.today().replace(day=1))
+        .group_by(HARVEST_MONTH)
+        .order_by(HARVEST_MONTH)
+        .limit(1)
+    )).first()
+    kpi = {
+        "farmers": farmer_count,
+        "plots": plot_count,
+        "plantings": sum(n for _, _, n in monthly),
+        "next_month_tons": round(next_month[1], 3) if next_month else 0,
+    }
+    _dashboard_cache[key] = kpi, series
+    return kpi, series
+
 @app.get("/dashboard", response_class=HTMLResponse)
-def dashboard(request: Request, user: User = Depends(require_user)):
+async def dashboard(request: Request, user: User = Depends(require_user_record), session: AsyncSession = Depends(get_session)):
+    kpi, series = await dashboard_data(session, user)
     return templates.TemplateResponse(
         "dashboard.html",
-        {"request": request, "user": user},
+        {"request": request, "user": user, "kpi": kpi, "series": series},
     )
 
 @app.get("/farmers", response_class=HTMLResponse)
-def farmers_page(request: Request, user: User = Depends(require_user), session: Session = Depends(get_session)):
-    farmers = session.exec(select(Farmer)).all()
+async def farmers_page(request: Request, user: User = Depends(require_user), session: AsyncSession = Depends(get_session)):
+    farmers = (await session.exec(select(Farmer))).all()
     return templates.TemplateResponse(
         "farmers.html",
         {"request": request, "user": user, "farmers": farmers},
     )
 
 @app.get("/plots", response_class=HTMLResponse)
-def plots_page(request: Request, user: User = Depends(require_user), session: Session = Depends(get_session)):
-    plots = session.exec(select(Plot)).all()
+async def plots_page(
+    request: Request,
+    q: Optional[str] = None,
+    user: User = Depends(require_user),
+    session: AsyncSession = Depends(get_session),
+):
+    stmt = select(Plot, Farmer).join(Farmer, Farmer.id == Plot.farmer_id)
+    if q and q.strip():
+        term = q.strip()
+        # a contains-search can't use a B-tree index, but filtering in SQL still
+        # keeps non-matching rows from being loaded
+        stmt = stmt.where(or_(
+            Plot.plot_name.icontains(term, autoescape=True),
+            Farmer.name.icontains(term, autoescape=True),
+            Farmer.code.icontains(term, autoescape=True),
+        ))
+
+    rows, farmers = [], {}
+    for plot, farmer in await session.exec(stmt):
+        rows.append(plot)
+        farmers[farmer.id] = farmer
     return templates.TemplateResponse(
         "plots.html",
-        {"request": request, "user": user, "plots": plots},
+        {"request": request, "user": user, "rows": rows, "farmers": farmers, "q": q or ""},
     )
 
 @app.get("/plantings", response_class=HTMLResponse)
-def plantings_page(request: Request, user: User = Depends(require_user), session: Session = Depends(get_session)):
-    plantings = session.exec(select(Planting)).all()
+async def plantings_page(
+    request: Request,
+    month: Optional[str] = None,
+    q: Optional[str] = None,
+    user: User = Depends(require_user),
+    session: AsyncSession = Depends(get_session),
+):
+    filters = []
+    if user.role == "farmer":
+        filters.append(Farmer.user_id == user.id)
+    q = (q or "").strip()
+    if q:
+        filters.append(or_(
+            Farmer.name.icontains(q, autoescape=True),
+            Farmer.code.icontains(q, autoescape=True),
+            Plot.plot_name.icontains(q, autoescape=True),
+            Planting.status.icontains(q, autoescape=True),
+        ))
+    if month:
+        try:
+            start, end = month_range(month)
+        except ValueError:
+            month = None
+        else:
+            filters += [Planting.harvest_date >= start, Planting.harvest_date < end]
+
+    rows = []
+    total_tons = 0.0
+    stmt = (
+        plantings_query(Planting, Plot, Farmer)
+        .where(*filters)
+        .order_by(Planting.plant_date.desc(), Planting.id)
+    )
+    # the validator hashes every value the table shows, in display order, so any
+    # edit to a farmer, plot or planting changes it; a match skips the render
+    fingerprint = hashlib.blake2b(f"{user.role}|{month or ''}|{q}".encode(), digest_size=8)
+    for pl, plot, farmer in await session.exec(stmt):
+        harvest_date = pl.harvest_date
+        harvest_month = month_key(harvest_date)
+        tons = round(plot.area_rai * pl.yield_ton_per_rai, 3)
+        total_tons += tons
+        rows.append({
+            "pl": pl,
+            "plot": plot,
+            "farmer": farmer,
+            "harvest_date": harvest_date,
+            "harvest_month": harvest_month,
+            "expected_tons": tons,
+        })
+        fingerprint.update(orjson.dumps([
+            pl.id, farmer.code, farmer.name, plot.plot_name, plot.area_rai,
+            pl.plant_date, harvest_date, tons, pl.status,
+        ]))
+
+    etag = f'W/"plantings-{user.id}-{fingerprint.hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in request.headers.get("if-none-match", "").split(", "):
+        return Response(status_code=304, headers=headers)
+
     return templates.TemplateResponse(
         "plantings.html",
-        {"request": request, "user": user, "plantings": plantings},
+        {
+            "request": request,
+            "user": user,
+            "rows": rows,
+            "month": month or "",
+            "q": q,
+            "total_tons": round(total_tons, 3),
+        },
+        headers=headers,
+    )
+
+# -----------------------------
+# EXPORT
+# -----------------------------
+HARVEST_CSV_HEADER = [
+    "farmer_code", "farmer_name", "plot_name", "area_rai", "plant_date",
+    "harvest_date", "harvest_month", "expected_tons", "status",
+]
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+def csv_cell(value):
+    # names typed at registration end up in a spreadsheet; a leading quote stops
+    # Excel/Sheets from evaluating them as formulas (CSV injection)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+async def harvest_csv_rows(user: User):
+    # the response outlives request-scoped dependencies, so the stream owns its session;
+    # rows are fetched and written one at a time and never held as a whole file
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(HARVEST_CSV_HEADER)
+    yield "\ufeff" + buf.getvalue()  # BOM so spreadsheet apps read the Thai text as UTF-8
+
+    stmt = plantings_query(
+        Farmer.code, Farmer.name, Plot.plot_name, Plot.area_rai, Planting.plant_date,
+        Planting.harvest_date, Plot.area_rai * Planting.yield_ton_per_rai, Planting.status,
+    ).order_by(Planting.harvest_date)
+    if user.role == "farmer":
+        stmt = stmt.where(Farmer.user_id == user.id)
+
+    async with AsyncSession(async_engine) as session:
+        result = await session.stream(stmt)
+        async for code, name, plot_name, area, plant_date, harvest_date, tons, status in result:
+            buf.seek(0)
+            buf.truncate()
+            writer.writerow([csv_cell(v) for v in (
+                code, name, plot_name, area, plant_date, harvest_date,
+                month_key(harvest_date), round(tons, 3), status,
+            )])
+            yield buf.getvalue()
+
+@app.get("/export/harvest.csv")
+async def export_harvest_csv(user: User = Depends(require_user)):
+    return StreamingResponse(
+        harvest_csv_rows(user),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": 'attachment; filename="harvest.csv"'},
     )